@@ -1,7 +1,13 @@
 ﻿#!/usr/bin/env python3
 """ A Python module for generating and solving random mazes using JSON.
-Implements a recursive depth-first search algorithm.
+Implements a depth-first search algorithm (generator) and a breadth-first
+search algorithm (solver), each walking an explicit stack or queue of cells
+instead of recursing, so the size of a maze is not limited by the interpreter
+recursion limit.
 https://en.wikipedia.org/wiki/Maze_generation_algorithm
+The JSON maze data is a grid of rows of cell bitmasks (top wall = 1, left
+wall = 2, path = 4, visited = 8), with an extra right closure column and a
+bottom closure row; grids of the older dictionary cells are also accepted.
 History:
 01.00 2023-Jun-19 Scott S. Initial release.
 
@@ -52,183 +58,319 @@ https://braintumor.org/
 https://www.cancer.org/
 """
 
-from random import randrange, shuffle
+from collections import deque
+from itertools import chain, permutations
+from random import getrandbits, randrange
 import json
 
+# Define the bitmask flags of a maze cell (the JSON maze data stores each
+# cell as this bitmask, a single number from 0 to 15)
+TOP = 1
+LEFT = 2
+PATH = 4
+VISITED = 8
 
-def get_maze(width=16, height=8):
-    """ Gets a random maze as a JSON data string.
+# Define the bitmask flag of the solution route, which is recorded by the
+# generator while carving the maze (it is not a part of the JSON maze data,
+# but lets the solver skip the search for a newly generated maze)
+ROUTE = 16
+
+# Define the byte translation tables that clear or set the visited flag of
+# every cell in a single pass, that clear the route flag, and that mark the
+# route flag as the path
+_UNVISITED = bytes(cell & ~VISITED for cell in range(256))
+_VISITED = bytes(cell | VISITED for cell in range(256))
+_UNROUTED = bytes(cell & ~ROUTE for cell in range(256))
+_ROUTED = bytes((cell | PATH) if (cell & ROUTE) else cell
+                for cell in range(256))
+
+# Define the four neighbor directions (west, east, north, south), and every
+# possible ordering of them, so that choosing one at random replaces a
+# neighbor shuffle
+_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+_ORDERS = tuple(permutations(_DIRECTIONS))
+
+# Define the wall between a cell and its neighbor in each direction, as the
+# (x, y) offset of the cell that owns the wall and its bitmask flag (a west
+# or north wall belongs to the cell itself, while an east or south wall is
+# the left or top wall of the neighbor)
+_WALLS = {(-1, 0): (0, 0, LEFT), (1, 0): (1, 0, LEFT),
+          (0, -1): (0, 0, TOP), (0, 1): (0, 1, TOP)}
+
+
+def _moves(directions=_DIRECTIONS, stride=1):
+    """ Gets the moves of the directions as (neighbor offset, wall offset,
+    wall flag) tuples, using the flat index offsets of a row stride.
+    Parameters
+    directions : the sequence of (dx, dy) directions
+    stride     : the number of cells in each row of the flat array
+    """
+
+    moves = []
+    for (dx, dy) in directions:
+        (wx, wy, bit) = _WALLS[(dx, dy)]
+        moves += [(dy * stride + dx, wy * stride + wx, bit)]
+    return moves
+
+
+def load_maze(data=None):
+    """ Loads the JSON maze data as a tuple of (cells, width, height), where
+    the cells are a flat array of bitmasks indexed as (y * (width + 1) + x).
+    Parameters
+    data : the JSON maze data
+    """
+
+    grid = json.loads(data)
+    width = len(grid[0]) - 1
+    height = len(grid) - 1
+    if isinstance(grid[0][0], int):
+        cells = bytearray(chain.from_iterable(grid))
+    else:
+        # (the older JSON maze data stores each cell as a dictionary of
+        # booleans, which is packed into a bitmask)
+        cells = bytearray(
+            (cell['top'] and TOP) | (cell['left'] and LEFT) |
+            (cell['path'] and PATH) | (cell['visited'] and VISITED)
+            for row in grid for cell in row)
+    return (cells, width, height)
+
+
+def dump_maze(maze=None):
+    """ Dumps the maze as a JSON data string.
+    Parameters
+    maze : the tuple of (cells, width, height)
+    """
+
+    (cells, width, height) = maze
+    stride = width + 1
+    cells = cells.translate(_UNROUTED)
+    grid = []
+    for y in range(height + 1):
+        grid += [list(cells[y * stride:(y + 1) * stride])]
+    return json.dumps(grid, separators=(',', ':'))
+
+
+def new_maze(width=16, height=8):
+    """ Gets a random maze as a tuple of (cells, width, height).
     Parameters
     width  : the width of the maze in cells
     height : the height of the maze in cells
     """
 
-    # Initialize a grid by stacking rows and columns of dictionary cells
-    # (includes an extra right closure column and a bottom closure row)
-    grid = [[None] * (width + 1) for i in range(height + 1)]
-    for y in range(height):
-        for x in range(width):
-            grid[y][x] = {
-                'top': True,
-                'left': True,
-                'path': False,
-                'visited': False
-            }
-            grid[y][width] = {
-                'top': False,
-                'left': True,
-                'path': False,
-                'visited': True
-            }
-    for x in range(width):
-        grid[height][x] = {
-            'top': True,
-            'left': False,
-            'path': False,
-            'visited': True
-        }
-    grid[height][width] = {
-        'top': False,
-        'left': False,
-        'path': False,
-        'visited': True
-    }
-
-    def enter_cell(x, y):
-        """ Enters a cell using a recursive depth-first search algorithm:
-        Accept a cell as a parameter
-        Mark the accepted cell as visited
-        While the accepted cell has unvisited neighbors
+    # Initialize a flat array of cells, with one bitmask per cell indexed as
+    # (y * stride + x) (includes an extra right closure column and a bottom
+    # closure row)
+    stride = width + 1
+    cells = bytearray(
+        (bytes([TOP | LEFT]) * width + bytes([LEFT | VISITED])) * height +
+        bytes([TOP | VISITED]) * width + bytes([VISITED]))
+
+    def enter_cell(x, y, ends=(), cells=cells, orders=_ORDERS,
+                   getrandbits=getrandbits):
+        """ Enters a cell using an iterative depth-first search algorithm
+        (an explicit stack of cells replaces the recursive calls, so the size
+        of the maze is not limited by the interpreter recursion limit):
+        Accept a cell as a parameter and push it onto the stack
+        While the stack is not empty, peek at the top cell
+        - If the top cell is new, mark it as visited and choose a random
+          ordering of its neighbors
         - Choose one of the remaining unvisited neighbors
-        - Remove the wall between the accepted cell and the chosen neighbor
-        - Recursively call the routine for the chosen neighbor
+        - Remove the wall between the top cell and the chosen neighbor (the
+          move of each direction names the cell owning that wall and its
+          flag, so every wall is cleared the same way)
+        - Push the chosen neighbor onto the stack (when the chosen neighbor
+          is one of the end cells, the stack holds its path from the first
+          cell, and a copy of it is kept)
+        - If no unvisited neighbors remain, pop the top cell from the stack
+        The closure column and row are already marked as visited, and stand
+        in for the missing neighbors beyond every edge of the grid (a step
+        west wraps into the closure column of the previous row, and a step
+        north from the first row wraps around into the closure row)
+        Returns the paths to the end cells, keyed by their indexes
         Parameters
-        x : the x-coordinate
-        y : the y-coordinate
+        x    : the x-coordinate
+        y    : the y-coordinate
+        ends : the indexes of the end cells
+        (the remaining parameters are only defaults, which bind the cells and
+        the helpers as fast local names for the duration of the walk)
         """
 
-        grid[y][x]['visited'] = True
-        neighbors = []
-        if x > 0:
-            neighbors += [(x - 1, y)]
-        if x < width:
-            neighbors += [(x + 1, y)]
-        if y > 0:
-            neighbors += [(x, y - 1)]
-        if y < height:
-            neighbors += [(x, y + 1)]
-        shuffle(neighbors)
-        for (nx, ny) in neighbors:
-            if grid[ny][nx]['visited']:
-                continue
-            if nx == x:
-                grid[max(y, ny)][x]['top'] = False
-            if ny == y:
-                grid[y][max(x, nx)]['left'] = False
-            enter_cell(nx, ny)
-
-    # Choose a random cell and begin walking the grid
-    enter_cell(randrange(width), randrange(height))
-    return json.dumps(grid)
+        orders = [_moves(order, stride) for order in orders]
+        count = len(orders)
+        bits = (count - 1).bit_length()
+        stack = [(y * stride + x, None)]
+        (push, pop) = (stack.append, stack.pop)
+        paths = {}
+        if stack[0][0] in ends:
+            paths[stack[0][0]] = [stack[0][0]]
+        while stack:
+            (i, neighbors) = stack[-1]
+            if neighbors is None:
+                cells[i] |= VISITED
+                # (draw just enough random bits to index an ordering, and
+                # reject the values beyond the table, like randrange() does)
+                order = getrandbits(bits)
+                while order >= count:
+                    order = getrandbits(bits)
+                neighbors = iter(orders[order])
+                stack[-1] = (i, neighbors)
+            for (d, w, bit) in neighbors:
+                n = i + d
+                if cells[n] & VISITED:
+                    continue
+                cells[i + w] &= ~bit
+                push((n, None))
+                if n in ends:
+                    paths[n] = [j for (j, neighbors) in stack]
+                break
+            else:
+                pop()
+        return paths
 
+    # Choose a random cell and begin walking the grid, keeping the paths to
+    # the entrance and the exit cells
+    entrance = 0
+    exit = (height - 1) * stride + width - 1
+    paths = enter_cell(randrange(width), randrange(height),
+                       frozenset((entrance, exit)))
 
-def set_maze_path(data=None):
-    """ Sets a solution path for the maze data.
+    # Mark the solution route (both paths lead down the spanning tree from
+    # the first cell, so the route joins them where they part, dropping the
+    # shared cells before the last one in common)
+    (a, b) = (paths[entrance], paths[exit])
+    shared = 1
+    while (shared < min(len(a), len(b))) and (a[shared] == b[shared]):
+        shared += 1
+    for i in a[shared - 1:] + b[shared:]:
+        cells[i] |= ROUTE
+    return (cells, width, height)
+
+
+def get_maze(width=16, height=8):
+    """ Gets a random maze as a JSON data string.
     Parameters
-    data : the JSON maze data
+    width  : the width of the maze in cells
+    height : the height of the maze in cells
     """
 
-    # Load the JSON maze data
-    grid = json.loads(data)
-    width = len(grid[0]) - 1
-    height = len(grid) - 1
+    return dump_maze(new_maze(width, height))
+
+
+def solve_maze(maze=None):
+    """ Sets a solution path for the maze, updating its cells in place.
+    Parameters
+    maze : the tuple of (cells, width, height)
+    """
+
+    (cells, width, height) = maze
+    stride = width + 1
+
+    # Mark the solution route as the path, when it was already recorded by
+    # the generator (the route always includes the entrance cell)
+    if cells[0] & ROUTE:
+        cells[:] = cells.translate(_ROUTED)
+        return maze
 
-    def test_path(x, y):
-        """ Tests all of the maze paths using a recursive depth-first search
-        algorithm until a solution has been found:
-        Accept a cell as a parameter
-        Mark the accepted cell as visited
-        If the accepted cell is equal to the exit cell, return as solved
-        Otherwise, while the accepted cell has unvisited, unwalled neighbors
-        - Choose one of the remaining unvisited, unwalled neighbors
-        - Recursively call the routine for the chosen neighbor until solved
-        If no neighbors return as solved, the accepted cell is discarded
+    def test_path(x, y, cells=cells):
+        """ Tests all of the maze paths using a breadth-first search algorithm,
+        working backwards from the exit until the entrance has been found
+        (every cell of a generated maze is connected by exactly one path, so
+        the parent links of the search lead straight back to the exit):
+        Accept a cell as a parameter, mark it as visited, and queue it
+        While the queue is not empty, take the first cell from the queue
+        - If the taken cell is equal to the entrance cell, follow the parent
+          links back to the accepted cell, marking the path, and return as
+          solved
+        - Otherwise, mark each unvisited, unwalled neighbor as visited
+          (using the same wall moves as the generator), link it to the
+          taken cell as its parent, and add it to the queue
+        If the queue empties without finding the entrance, return as unsolved
+        The closure column and row are marked as visited, and stand in for
+        the missing neighbors beyond every edge of the grid, in the same way
+        as for the generator
         Parameters
         x : the x-coordinate
         y : the y-coordinate
+        (the remaining parameter is only a default, which binds the cells as
+        a fast local name for the duration of the search)
         """
 
-        grid[y][x]['visited'] = True
-        if (x == (width - 1)) and (y == (height - 1)):
-            grid[y][x]['path'] = True
-            return True
-        neighbors = []
-        if x > 0:
-            neighbors += [(x - 1, y)]
-        if x < width:
-            neighbors += [(x + 1, y)]
-        if y > 0:
-            neighbors += [(x, y - 1)]
-        if y < height:
-            neighbors += [(x, y + 1)]
-        for (nx, ny) in neighbors:
-            if grid[ny][nx]['visited']:
-                continue
-            if (nx == x) and (grid[max(y, ny)][x]['top']):
-                continue
-            if (ny == y) and (grid[y][max(x, nx)]['left']):
-                continue
-            if not test_path(nx, ny):
-                continue
-            grid[y][x]['path'] = True
-            return True
+        moves = _moves(_DIRECTIONS, stride)
+        parents = [None] * len(cells)
+        i = y * stride + x
+        cells[i] |= VISITED
+        queue = deque([i])
+        (enqueue, dequeue) = (queue.append, queue.popleft)
+        while queue:
+            i = dequeue()
+            if i == 0:
+                while i is not None:
+                    cells[i] |= PATH
+                    i = parents[i]
+                return True
+            for (d, w, bit) in moves:
+                n = i + d
+                if (cells[n] & VISITED) or (cells[i + w] & bit):
+                    continue
+                cells[n] |= VISITED
+                parents[n] = i
+                enqueue(n)
         return False
 
-    # Reset the visited flags, and then begin testing all of the generated
-    # paths, starting from the entrance, continuing until an exit is found
-    for y in range(height):
-        for x in range(width):
-            grid[y][x]['visited'] = False
-    test_path(0, 0)
-    return json.dumps(grid)
+    # Reset the visited flags (except for the closure column and row, which
+    # are sliced out as every stride cell from the end of the first row, and
+    # as the cells from the start of the last row), and then begin testing
+    # all of the generated paths, starting from the exit, continuing until the
+    # entrance is found
+    closure = height * stride
+    cells[:] = cells.translate(_UNVISITED)
+    cells[width::stride] = cells[width::stride].translate(_VISITED)
+    cells[closure:] = cells[closure:].translate(_VISITED)
+    test_path(width - 1, height - 1)
+    return maze
+
+
+def set_maze_path(data=None):
+    """ Sets a solution path for the maze data.
+    Parameters
+    data : the JSON maze data
+    """
+
+    return dump_maze(solve_maze(load_maze(data)))
 
 
 def write_maze(data=None):
     """ Writes the maze data as a printable string.
     Parameters
-    data : the JSON maze data
+    data : the JSON maze data, or a tuple of (cells, width, height)
     """
 
-    # Load the JSON maze data
-    grid = json.loads(data)
-    width = len(grid[0]) - 1
-    height = len(grid) - 1
+    # Load the JSON maze data (a maze tuple is used as is)
+    if isinstance(data, str):
+        data = load_maze(data)
+    (cells, width, height) = data
+    stride = width + 1
 
-    # Remove the entrance and exit walls
-    grid[0][0]['left'] = False
-    grid[height - 1][width]['left'] = False
+    # Remove the entrance and exit walls (from a copy of the cells)
+    cells = bytearray(cells)
+    cells[0] &= ~LEFT
+    cells[(height - 1) * stride + width] &= ~LEFT
 
-    # Write the maze as a text string
-    s = '\n  '
-    c = ' '
+    # Define the text segments of a cell, indexed by its top wall flag, or
+    # by its left wall flag and path flag (shifted down as the two low bits)
+    tops = ('+   ', '+---')
+    lefts = ('    ', '|   ', '  . ', '| . ')
+
+    # Write the maze as a text string (each line is joined from the segments
+    # looked up for its cells, and the lines are joined only once at the end)
+    lines = ['']
     for y in range(height + 1):
-        for x in range(width + 1):
-            if grid[y][x]['top']:
-                s += '+---'
-            else:
-                s += '+   '
-        s += '\n  '
-        for x in range(width + 1):
-            if grid[y][x]['path']:
-                c = '.'
-            else:
-                c = ' '
-            if grid[y][x]['left']:
-                s += '| ' + c + ' '
-            else:
-                s += '  ' + c + ' '
-        s += '\n  '
-    return s
+        row = cells[y * stride:(y + 1) * stride]
+        lines += [''.join([tops[cell & TOP] for cell in row])]
+        lines += [''.join([lefts[(cell & (LEFT | PATH)) >> 1]
+                           for cell in row])]
+    lines += ['']
+    return '\n  '.join(lines)
 
 
 def main(width=16, height=8, unsolved=True, solved=True):
@@ -240,12 +382,12 @@ def main(width=16, height=8, unsolved=True, solved=True):
     solved   : a flag to show the solved maze
     """
 
-    data = get_maze(width, height)
+    maze = new_maze(width, height)
     if unsolved:
-        print(write_maze(data))
+        print(write_maze(maze))
     if solved:
-        data = set_maze_path(data)
-        print(write_maze(data))
+        solve_maze(maze)
+        print(write_maze(maze))
 
 
 # Start the program interactively
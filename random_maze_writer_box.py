@@ -105,60 +105,56 @@ https://www.cancer.org/
 """
 
 import random_maze_solver_json as rmsj
-import json
 
 
 def write_maze_box(data=None):
     """ Writes the maze data as a printable string (Unicode box characters).
     Parameters
-    data : the JSON maze data
+    data : the JSON maze data, or a tuple of (cells, width, height)
     """
 
-    # Define the bitmask mapping string of box characters
+    # Define the bitmask mapping string of box characters, and the text
+    # segments of a cell, indexed by its connector bitmask (each character
+    # is joined with the top wall segment to its east, which is present
+    # whenever the E bit is set), or by its left wall flag and path flag
+    # (shifted down as the two low bits)
     box = ' ╶╴─╷┌┐┬╵└┘┴│├┤┼'
-
-    # Load the JSON maze data
-    grid = json.loads(data)
-    width = len(grid[0]) - 1
-    height = len(grid) - 1 
-
-    # Remove the entrance and exit walls
-    grid[0][0]['left'] = False
-    grid[height - 1][width]['left'] = False
-
-    # Write the maze as a text string
-    s = '\n  '
-    c = ' '
+    tops = tuple(b + ('───' if (mask & 1) else '   ')
+                 for (mask, b) in enumerate(box))
+    lefts = ('    ', '│   ', '  . ', '│ . ')
+
+    # Load the JSON maze data (a maze tuple is used as is), and bind the
+    # bitmask flags as local names for the character lookups
+    if isinstance(data, str):
+        data = rmsj.load_maze(data)
+    (cells, width, height) = data
+    stride = width + 1
+    (TOP, LEFT, PATH) = (rmsj.TOP, rmsj.LEFT, rmsj.PATH)
+
+    # Remove the entrance and exit walls (from a copy of the cells)
+    cells = bytearray(cells)
+    cells[0] &= ~LEFT
+    cells[(height - 1) * stride + width] &= ~LEFT
+
+    # Write the maze as a text string (the connector bitmasks of a row are
+    # combined from the row itself, the row above it, and the row shifted by
+    # one cell, where with TOP = 1 and LEFT = 2 each wall flag only has to be
+    # shifted into place: N = above LEFT << 2, S = LEFT << 1,
+    # W = west TOP << 1, and E = TOP; each line is joined from its segments,
+    # and the lines are joined only once at the end)
+    lines = ['']
+    above = bytes(stride)
     for y in range(height + 1):
-        for x in range(width + 1):
-            mask = 0
-            if y > 0:
-                if grid[y - 1][x]['left']:
-                    mask += 8
-            if grid[y][x]['left']:
-                mask += 4
-            if x > 0:
-                if grid[y][x-1]['top']:
-                    mask += 2
-            if grid[y][x]['top']:
-                mask += 1
-            b = box[mask]
-            if grid[y][x]['top']:
-                s += b + '───'
-            else:
-                s += b + '   '
-        s += '\n  '
-        for x in range(width + 1):
-            if grid[y][x]['path']:
-                c = '.'
-            else:
-                c = ' '
-            if grid[y][x]['left']:
-                s += '│ ' + c + ' '
-            else:
-                s += '  ' + c + ' '
-        s += '\n  '
-    return s
+        row = cells[y * stride:(y + 1) * stride]
+        west = b'\x00' + row[:-1]
+        lines += [''.join([tops[((n & LEFT) << 2) | ((c & LEFT) << 1) |
+                                ((w & TOP) << 1) | (c & TOP)]
+                           for (n, c, w) in zip(above, row, west)])]
+        lines += [''.join([lefts[(cell & (LEFT | PATH)) >> 1]
+                           for cell in row])]
+        above = row
+    lines += ['']
+    return '\n  '.join(lines)
 
 
 def main(width=16, height=8, unsolved=True, solved=True):
@@ -170,12 +166,12 @@ def main(width=16, height=8, unsolved=True, solved=True):
     solved   : a flag to show the solved maze
     """
 
-    data = rmsj.get_maze(width, height)
+    maze = rmsj.new_maze(width, height)
     if unsolved:
-        print(write_maze_box(data))
+        print(write_maze_box(maze))
     if solved:
-        data = rmsj.set_maze_path(data)
-        print(write_maze_box(data))
+        rmsj.solve_maze(maze)
+        print(write_maze_box(maze))
 
 
 # Start the program interactively